@@ -3,23 +3,27 @@
 # See LICENSE file for licensing details.
 """Dispatch logic for the Cilium charm."""
 
+import filecmp
+import hashlib
+import json
 import logging
+import os
+import platform
 import shutil
 import subprocess
 import tarfile
-import tempfile
-from functools import cached_property
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
 from subprocess import check_output
 from tarfile import TarError
-from typing import List, Mapping
+from typing import BinaryIO, List, Mapping, Optional, Tuple
 
 from charms.grafana_k8s.v0.grafana_dashboard import GrafanaDashboardProvider
 from charms.prometheus_k8s.v0.prometheus_remote_write import (
     PrometheusRemoteWriteConsumer,
 )
 from httpx import ConnectError, HTTPError
-from jinja2 import Environment, FileSystemLoader
 from lightkube import Client, codecs
 from lightkube.core.exceptions import ApiError
 from ops.charm import CharmBase
@@ -31,26 +35,78 @@ from ops.model import (
     BlockedStatus,
     MaintenanceStatus,
     ModelError,
+    StatusBase,
     WaitingStatus,
 )
-from pydantic import ValidationError
 
 from cilium_manifests import CiliumManifests
 from hubble_manifests import HubbleManifests
-from metrics_validator import HubbleMetrics
 
 log = logging.getLogger(__name__)
 
 CLI_CLIENTS_PATH = Path("/usr/local/bin")
 TEMPLATES_PATH = Path("./templates")
 PORT_FORWARD_SERVICE = "hubble-port-forward.service"
+SYSTEMD_PATH = Path("/etc/systemd/system")
+SYSCTL_PATH = Path("/proc/sys")
+SYSTEMD_CGROUP_PATHS = (
+    Path("/sys/fs/cgroup/system.slice"),  # cgroup v2
+    Path("/sys/fs/cgroup/systemd/system.slice"),  # cgroup v1
+)
 RESOURCES = ["cilium", "hubble"]
+MACHINE_TO_DPKG = {
+    "x86_64": "amd64",
+    "aarch64": "arm64",
+    "armv7l": "armhf",
+    "ppc64le": "ppc64el",
+    "s390x": "s390x",
+}
+API_WORKERS = 8
+IO_BUFSIZE = 1 << 20
+
+
+@lru_cache(maxsize=None)
+def _arch() -> str:
+    """Return the dpkg architecture name of this machine."""
+    if architecture := MACHINE_TO_DPKG.get(platform.machine()):
+        return architecture
+    return check_output(["dpkg", "--print-architecture"]).rstrip().decode("utf-8")
+
+
+def _config_hash(*parts) -> str:
+    """Hash JSON-serializable config parts to detect changes between applies."""
+    encoded = json.dumps(parts, sort_keys=True).encode()
+    return hashlib.blake2b(encoded).hexdigest()
+
+
+def _resources_missing(manifests) -> bool:
+    """Whether any resource of the manifests is absent from the cluster."""
+    return bool(set(manifests.resources) - manifests.installed_resources())
+
+
+def _install_binary(src: BinaryIO, dest: Path) -> None:
+    """Atomically install an executable from a file object."""
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            # O_CREAT's mode is ignored when a stale temp file is reused.
+            os.fchmod(out.fileno(), 0o755)
+            shutil.copyfileobj(src, out, IO_BUFSIZE)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
 
 
 def _sysctl_get(*keys: str) -> Mapping[str, str]:
     """Get sysctl values for the specified keys."""
     if not keys:
         raise ValueError("At least one key must be provided.")
+    try:
+        return {key: (SYSCTL_PATH / key.replace(".", "/")).read_text().strip() for key in keys}
+    except OSError:
+        log.debug("Falling back to sysctl for %s", keys)
     out = check_output(["sysctl", *keys], text=True)
     return dict(line.split(" = ") for line in out.splitlines())
 
@@ -65,17 +121,21 @@ class CiliumCharm(CharmBase):
 
         self.stored.set_default(
             cilium_configured=False,
+            cilium_apply_hash="",
+            hubble_apply_hash="",
             hubble_configured=False,
             hubble_mismatch_config=False,
+            last_cidr="",
+            port_forward_enabled=None,
+            resource_sig={},
             unallowed_metrics=False,
         )
 
+        self._last_status: Optional[StatusBase] = None
         self.hubble_metrics: List[str] = []
         self.cilium_manifests = CiliumManifests(self, self.config, self.hubble_metrics)
         self.hubble_manifests = HubbleManifests(self, self.config)
-        self.collector = Collector(self.cilium_manifests, self.hubble_manifests)
 
-        self.jinja2_env = Environment(loader=FileSystemLoader("templates/"))
         self.grafana_dashboard_provider = GrafanaDashboardProvider(self)
         self.remote_write_consumer = PrometheusRemoteWriteConsumer(self)
 
@@ -97,6 +157,18 @@ class CiliumCharm(CharmBase):
         self.framework.observe(self.on.list_versions_action, self._list_versions)
         self.framework.observe(self.on.list_resources_action, self._list_resources)
 
+    @cached_property
+    def collector(self) -> Collector:
+        """Collector over the Cilium and Hubble manifests, built on first use."""
+        return Collector(self.cilium_manifests, self.hubble_manifests)
+
+    @cached_property
+    def jinja2_env(self):
+        """Jinja2 environment for the Grafana Agent templates, imported on first use."""
+        from jinja2 import Environment, FileSystemLoader
+
+        return Environment(loader=FileSystemLoader("templates/"), auto_reload=False)
+
     def _list_versions(self, event):
         self.collector.list_versions(event)
 
@@ -105,23 +177,21 @@ class CiliumCharm(CharmBase):
         resources = event.params.get("resources", "")
         return self.collector.list_resources(event, manifests, resources)
 
-    @cached_property
-    def _arch(self):
-        architecture = check_output(["dpkg", "--print-architecture"]).rstrip()
-        architecture = architecture.decode("utf-8")
-        return architecture
-
     def _check_port_forward_service(self):
         if self.stored.hubble_mismatch_config:
-            self.unit.status = BlockedStatus("Enable Hubble to use Hubble port-forward service.")
+            self._set_status(BlockedStatus("Enable Hubble to use Hubble port-forward service."))
+            return
+        port_forward = self.model.config["port-forward-hubble"]
+        if not port_forward and self.stored.port_forward_enabled is False:
+            # The charm disabled the service itself, no need to ask systemd.
             return
         rc = self._get_service_status(PORT_FORWARD_SERVICE)
         waiting_msg = "Waiting Hubble port-forward service."
-        if self.model.config["port-forward-hubble"]:
+        if port_forward:
             if rc:
-                self.unit.status = WaitingStatus(waiting_msg)
+                self._set_status(WaitingStatus(waiting_msg))
         elif not rc:
-            self.unit.status = WaitingStatus(waiting_msg)
+            self._set_status(WaitingStatus(waiting_msg))
 
     @cached_property
     def _client(self) -> Client:
@@ -129,125 +199,177 @@ class CiliumCharm(CharmBase):
         client = Client(field_manager=f"{self.model.app.name}")
         return client
 
-    def _configure_cilium(self, event):
+    @cached_property
+    def _cni_relation_state(self) -> Tuple[Optional[str], Optional[str]]:
+        """Scan the CNI relation data once for the kubeconfig hash and service CIDR."""
+        kubeconfig_hash, cidr = None, None
+        for relation in self.model.relations["cni"]:
+            for unit in relation.units:
+                data = relation.data[unit]
+                kubeconfig_hash = kubeconfig_hash or data.get("kubeconfig-hash")
+                cidr = cidr or data.get("service-cidr")
+                if kubeconfig_hash and cidr:
+                    return kubeconfig_hash, cidr
+        return kubeconfig_hash, cidr
+
+    def _configure_cilium(self, event, config: Mapping):
+        """Apply the Cilium and Hubble manifests.
+
+        An apply is skipped only when its config hash matches the last successful
+        apply and every resource is still present in the cluster; deleted objects
+        are re-created by the next config-changed or cni-relation-changed. The
+        kubeconfig hash in the config hash only forces a re-apply against a new
+        control plane; drift within the same cluster is caught by the presence check.
+        """
         self.stored.cilium_configured = False
 
-        if not self._get_kubeconfig_status():
-            return self._ops_wait_for(event, "Waiting for Kubernetes API", exc_info=True)
+        if not self._kubeconfig_ready:
+            return self._ops_wait_for(event, "Waiting for Kubernetes API")
 
         log.info("Applying Cilium manifests")
-        self._configure_hubble(event)
+        self._configure_hubble(event, config)
         self._configure_cilium_cni(event)
 
         self.stored.cilium_configured = True
 
     def _configure_cilium_cni(self, event):
+        self.cilium_manifests.service_cidr = self._get_service_cidr()
+        apply_hash = _config_hash(
+            self.cilium_manifests.config, self.hubble_metrics, self._kubeconfig_hash
+        )
+        if apply_hash == self.stored.cilium_apply_hash and not _resources_missing(
+            self.cilium_manifests
+        ):
+            log.info("Cilium manifests unchanged and installed, skipping apply.")
+            return
         try:
-            self.unit.status = MaintenanceStatus("Applying Cilium resources.")
-            self.cilium_manifests.service_cidr = self._get_service_cidr()
+            self._set_status(MaintenanceStatus("Applying Cilium resources."))
             self.cilium_manifests.apply_manifests()
+            self.stored.cilium_apply_hash = apply_hash
         except (ManifestClientError, ConnectError):
             return self._ops_wait_for(
                 event, "Waiting to retry Cilium configuration.", exc_info=True
             )
 
-    def _configure_cni_relation(self):
-        self.unit.status = MaintenanceStatus("Configuring CNI relation")
-        cidr = self.model.config["cluster-pool-ipv4-cidr"]
+    def _configure_cni_relation(self, config: Mapping):
+        values = {"cidr": config["cluster-pool-ipv4-cidr"], "cni-conf-file": "05-cilium.conf"}
         for r in self.model.relations["cni"]:
-            r.data[self.unit]["cidr"] = cidr
-            r.data[self.unit]["cni-conf-file"] = "05-cilium.conf"
+            data = r.data[self.unit]
+            if changed := {k: v for k, v in values.items() if data.get(k) != v}:
+                self._set_status(MaintenanceStatus("Configuring CNI relation"))
+                data.update(changed)
 
-    def _configure_hubble(self, event):
-        if self.model.config["enable-hubble"]:
+    def _configure_hubble(self, event, config: Mapping):
+        if config["enable-hubble"]:
             try:
-                self.unit.status = MaintenanceStatus("Applying Hubble resources.")
-                self._configure_hubble_metrics()
+                self._configure_hubble_metrics(config)
+                apply_hash = _config_hash(self.hubble_manifests.config, self._kubeconfig_hash)
+                if (
+                    self.stored.hubble_configured
+                    and apply_hash == self.stored.hubble_apply_hash
+                    and not _resources_missing(self.hubble_manifests)
+                ):
+                    log.info("Hubble manifests unchanged and installed, skipping apply.")
+                    return
+                self._set_status(MaintenanceStatus("Applying Hubble resources."))
                 self.hubble_manifests.apply_manifests()
                 self.stored.hubble_configured = True
+                self.stored.hubble_apply_hash = apply_hash
             except (ManifestClientError, ConnectError):
                 return self._ops_wait_for(
                     event, "Waiting to retry Hubble configuration.", exc_info=True
                 )
-            except (ValidationError, ValueError):
+            except ValueError:
                 msg = "Hubble Metrics should only contain valid metrics values."
-                self.unit.status = BlockedStatus(msg)
+                self._set_status(BlockedStatus(msg))
                 self.stored.unallowed_metrics = True
                 log.exception(msg)
                 return
 
         elif self.stored.hubble_configured:
             try:
-                self.unit.status = MaintenanceStatus("Removing Hubble resources.")
+                self._set_status(MaintenanceStatus("Removing Hubble resources."))
                 self.hubble_manifests.delete_manifests()
                 self.stored.hubble_configured = False
+                self.stored.hubble_apply_hash = ""
             except (ManifestClientError, ConnectError):
                 return self._ops_wait_for(event, "Waiting to retry Hubble removal.", exc_info=True)
 
-    def _configure_hubble_metrics(self):
-        if values := self.model.config["enable-hubble-metrics"]:
-            try:
-                values = values.split()
-                valid_metrics = HubbleMetrics(metrics=values)
-                self.hubble_metrics.clear()
-                self.hubble_metrics.extend(valid_metrics.metrics)
-                self.stored.unallowed_metrics = False
-            except ValueError:
-                raise
+    def _configure_hubble_metrics(self, config: Mapping):
+        if values := config["enable-hubble-metrics"]:
+            from metrics_validator import validate_hubble_metrics
+
+            valid_metrics = validate_hubble_metrics(values)
+            self.hubble_metrics.clear()
+            self.hubble_metrics.extend(valid_metrics)
+            self.stored.unallowed_metrics = False
 
     def _deploy_grafana_agent(self, remote_endpoints):
         objects = self._render_grafana_agent_manifests(remote_endpoints=remote_endpoints)
-        for obj in objects:
-            self._client.apply(obj)
-
-    def _get_kubeconfig_status(self):
-        for relation in self.model.relations["cni"]:
-            for unit in relation.units:
-                if relation.data[unit].get("kubeconfig-hash"):
-                    return True
-        return False
-
-    def _get_arch_cli_tools(self, members, name):
-        for tarinfo in members:
-            if tarinfo.name == name:
-                yield tarinfo
+        with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+            list(executor.map(self._client.apply, objects))
+
+    def _extract_cli_resource(
+        self, executor: Executor, rsc: str, arch: str
+    ) -> Optional[Tuple[List[int], Future]]:
+        """Fetch a CLI resource and submit its extraction unless it is already installed."""
+        filename = f"{rsc}-linux-{arch}.tar.gz"
+        path = Path(self.model.resources.fetch(rsc))
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+        installed = (CLI_CLIENTS_PATH / rsc).exists()
+        if installed and self.stored.resource_sig.get(rsc) == signature:
+            log.info(f"{rsc} resource unchanged, skipping extraction")
+            return None
+        log.info(f"Extracting {rsc} binary from {filename}")
+        return signature, executor.submit(self._unpack_archive, path, filename)
 
     def _get_service_status(self, service_name):
         """Check if service is active, returns 0 on success, otherwise non-zero value."""
+        # systemd removes a service's cgroup once it has no running processes
+        if any((path / service_name).is_dir() for path in SYSTEMD_CGROUP_PATHS):
+            return 0
         return subprocess.call(["systemctl", "is-active", service_name])
 
-    def _get_service_cidr(self):
-        for relation in self.model.relations["cni"]:
-            for unit in relation.units:
-                if cidr := relation.data[unit].get("service-cidr"):
-                    return cidr
+    def _get_service_cidr(self) -> Optional[str]:
+        return self._cni_relation_state[1]
 
     def _install_cli_resources(self):
         self._manage_port_forward_service()
         try:
-            for rsc in RESOURCES:
-                arch = self._arch
-                filename = f"{rsc}-linux-{arch}.tar.gz"
-                log.info(f"Extracting {rsc} binary from {filename}")
-                path = self.model.resources.fetch(rsc)
-                self._unpack_archive(path, filename)
+            arch = _arch()
+            # Extractions are independent and spend their time in zlib, which
+            # releases the GIL; stored state is only updated from this thread.
+            with ThreadPoolExecutor(max_workers=len(RESOURCES)) as executor:
+                pending = {
+                    rsc: self._extract_cli_resource(executor, rsc, arch) for rsc in RESOURCES
+                }
+            for rsc, extraction in pending.items():
+                if extraction:
+                    signature, future = extraction
+                    future.result()
+                    self.stored.resource_sig[rsc] = signature
 
         except ModelError as e:
-            self.unit.status = BlockedStatus("Unable to claim the CLI resources.")
+            self._set_status(BlockedStatus("Unable to claim the CLI resources."))
             log.error(e)
             return
         except (FileNotFoundError, NameError) as e:
-            self.unit.status = BlockedStatus("CLI resources missing.")
+            self._set_status(BlockedStatus("CLI resources missing."))
             log.error(e)
             return
         except (PermissionError, TarError):
-            self.unit.status = BlockedStatus("Error unpacking CLI binaries.")
+            self._set_status(BlockedStatus("Error unpacking CLI binaries."))
             log.exception("CLI binaries could not be installed.")
             return
 
     def _install_service(self, service_file_path):
         try:
-            service_path = Path("/etc/systemd/system")
+            service_path = SYSTEMD_PATH
+            installed = service_path / Path(service_file_path).name
+            if installed.exists() and filecmp.cmp(service_file_path, installed, shallow=False):
+                log.info(f"{installed.name} is up to date.")
+                return
             shutil.copy(service_file_path, service_path)
             subprocess.check_call(["systemctl", "daemon-reload"])
         except subprocess.CalledProcessError:
@@ -255,40 +377,60 @@ class CiliumCharm(CharmBase):
         except OSError:
             log.exception("Destination folder: {service_path} is not writable.")
 
+    def _invalidate_hook_cache(self):
+        """Drop values cached for the duration of a single event handler."""
+        self.__dict__.pop("_cni_relation_state", None)
+        self.cilium_manifests.invalidate()
+
+    @property
+    def _kubeconfig_hash(self) -> Optional[str]:
+        """Hash of the kubeconfig published on the CNI relation, if any."""
+        return self._cni_relation_state[0]
+
+    @property
+    def _kubeconfig_ready(self) -> bool:
+        """Whether any CNI relation unit has published a kubeconfig."""
+        return bool(self._kubeconfig_hash)
+
     def _manage_port_forward_service(self, enable=False):
+        if not enable and self.stored.port_forward_enabled is False:
+            return
         try:
-            if enable:
-                subprocess.check_call(["systemctl", "enable", PORT_FORWARD_SERVICE])
-                subprocess.check_call(["systemctl", "start", PORT_FORWARD_SERVICE])
-            else:
-                subprocess.check_call(["systemctl", "disable", PORT_FORWARD_SERVICE])
-                subprocess.check_call(["systemctl", "stop", PORT_FORWARD_SERVICE])
+            action = "enable" if enable else "disable"
+            subprocess.check_call(["systemctl", action, "--now", PORT_FORWARD_SERVICE])
+            self.stored.port_forward_enabled = enable
 
-            self.unit.status = WaitingStatus("Waiting Hubble port-forward service.")
+            self._set_status(WaitingStatus("Waiting Hubble port-forward service."))
         except subprocess.CalledProcessError:
             log.exception(f"Failed to modify {PORT_FORWARD_SERVICE} service")
 
     def _on_config_changed(self, event):
-        self._configure_cni_relation()
-        self._configure_cilium(event)
+        self._invalidate_hook_cache()
+        config = dict(self.model.config)
+        if (cidr := config["cluster-pool-ipv4-cidr"]) != self.stored.last_cidr:
+            self._configure_cni_relation(config)
+            self.stored.last_cidr = cidr
+        self._configure_cilium(event, config)
         self._install_cli_resources()
-        self._on_port_forward_hubble()
+        self._on_port_forward_hubble(config)
         self._set_active_status()
 
     def _on_cni_relation_changed(self, event):
-        self._configure_cilium(event)
+        self._invalidate_hook_cache()
+        self._configure_cilium(event, dict(self.model.config))
         self._set_active_status()
 
     def _on_cni_relation_joined(self, _):
-        self._configure_cni_relation()
+        self._invalidate_hook_cache()
+        self._configure_cni_relation(dict(self.model.config))
         self._set_active_status()
 
     def _on_install(self, _):
         self._install_service(self.charm_dir / "services" / PORT_FORWARD_SERVICE)
 
-    def _on_port_forward_hubble(self):
-        enable_port_forward = self.model.config["port-forward-hubble"]
-        enable_hubble = self.model.config["enable-hubble"]
+    def _on_port_forward_hubble(self, config: Mapping):
+        enable_port_forward = config["port-forward-hubble"]
+        enable_hubble = config["enable-hubble"]
         if enable_port_forward:
             if enable_hubble:
                 self._manage_port_forward_service(enable_port_forward)
@@ -297,6 +439,7 @@ class CiliumCharm(CharmBase):
                 self.stored.hubble_mismatch_config = True
 
     def _on_remote_write_changed(self, event):
+        self._invalidate_hook_cache()
         if self.remote_write_consumer.endpoints:
             self._handle_grafana_agent(
                 event,
@@ -307,15 +450,16 @@ class CiliumCharm(CharmBase):
             )
 
     def _on_remote_write_departed(self, event):
+        self._invalidate_hook_cache()
         self._handle_grafana_agent(event, "Removing", "remove", self._remove_grafana_agent)
 
     def _handle_grafana_agent(self, event, action_verb, action_noun, operation, context=None):
         if not self.unit.is_leader():
             return
-        self.unit.status = MaintenanceStatus(f"{action_verb} Grafana Agent")
+        self._set_status(MaintenanceStatus(f"{action_verb} Grafana Agent"))
 
-        if not self._get_kubeconfig_status():
-            self.unit.status = WaitingStatus("Waiting for Kubernetes API")
+        if not self._kubeconfig_ready:
+            self._set_status(WaitingStatus("Waiting for Kubernetes API"))
             log.info(f"Unable to {action_noun} Grafana Agent manifest, will retry.")
             event.defer()
             return
@@ -331,21 +475,29 @@ class CiliumCharm(CharmBase):
         self._set_active_status()
 
     def _ops_wait_for(self, event, msg, exc_info=None):
-        self.unit.status = WaitingStatus(msg)
+        self._set_status(WaitingStatus(msg))
         if exc_info:
             log.exception(msg)
         event.defer()
         return msg
 
     def _on_upgrade_charm(self, _):
+        self._invalidate_hook_cache()
         self.stored.cilium_configured = False
+        self.stored.cilium_apply_hash = ""
+        self.stored.hubble_apply_hash = ""
+        self.stored.resource_sig = {}
         self._install_cli_resources()
 
     def _remove_grafana_agent(self):
         objects = self._render_grafana_agent_manifests()
-        for obj in objects:
+
+        def delete(obj):
             self._client.delete(type(obj), obj.metadata.name, namespace=obj.metadata.namespace)
 
+        with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+            list(executor.map(delete, objects))
+
     def _render_grafana_agent_manifests(self, remote_endpoints=""):
         template_args = {
             "juju_model": self.model.name,
@@ -375,6 +527,12 @@ class CiliumCharm(CharmBase):
                 issues.append("sysctl rp_filter enabled for interfaces.")
         return issues
 
+    def _set_status(self, status: StatusBase):
+        """Set the unit status, skipping the status-set call when unchanged."""
+        if status != self._last_status:
+            self.unit.status = status
+            self._last_status = status
+
     def _set_active_status(self):
         if not self.stored.cilium_configured:
             return
@@ -386,27 +544,32 @@ class CiliumCharm(CharmBase):
             return
 
         if issues := self._environment_issues():
-            self.unit.status = BlockedStatus(
-                "Environment issues detected: check logs for details."
-            )
+            self._set_status(BlockedStatus("Environment issues detected: check logs for details."))
             log.error("Environment issues:\n%s\n", "\n  -".join(issues))
             return
 
-        self.unit.status = ActiveStatus("Ready")
+        self._set_status(ActiveStatus("Ready"))
         self.unit.set_workload_version(self.collector.short_version)
 
         self._check_port_forward_service()
 
     def _unpack_archive(self, path, filename):
-        # Extract only the required arch tar.gz file from the bundle
-        tar = tarfile.open(path)
-        with tempfile.TemporaryDirectory() as tmp:
-            tar.extractall(tmp, members=self._get_arch_cli_tools(tar, filename))
-            tar.close()
-            # Extract the binary
-            arch_tgz = tarfile.open(Path(tmp) / filename)
-            arch_tgz.extractall(CLI_CLIENTS_PATH)
-            arch_tgz.close()
+        # Extract only the binaries of the required arch tar.gz from the bundle.
+        # The bundle is opened seekable; the inner archive is streamed, with its
+        # compression detected from the data rather than its file name.
+        with open(path, "rb", buffering=IO_BUFSIZE) as f, tarfile.open(
+            fileobj=f, mode="r:*"
+        ) as outer:
+            # Stop at the first match; getmember() would index the whole bundle.
+            member = next((m for m in outer if m.name == filename), None)
+            if member is None:
+                raise FileNotFoundError(f"{filename} not found in {path}")
+            with outer.extractfile(member) as raw:
+                with tarfile.open(fileobj=raw, mode="r|*", bufsize=IO_BUFSIZE) as inner:
+                    for binary in inner:
+                        if binary.isfile():
+                            dest = CLI_CLIENTS_PATH / Path(binary.name).name
+                            _install_binary(inner.extractfile(binary), dest)
 
 
 if __name__ == "__main__":  # pragma: nocover
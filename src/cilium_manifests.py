@@ -3,151 +3,166 @@
 import hashlib
 import json
 import logging
-from typing import Dict, Optional
+from collections import defaultdict
+from functools import cached_property
+from typing import DefaultDict, Dict, KeysView, List, Optional, Tuple
 
-from ops.manifests import ConfigRegistry, ManifestLabel, Manifests, Patch
+from ops.manifests import ConfigRegistry, HashableResource, ManifestLabel, Manifests, Patch
 
 log = logging.getLogger(__name__)
 
 
-class PatchHubbleMetricsConfigMap(Patch):
-    """Configure Hubble Prometheus metrics."""
+class TargetedPatch(Patch):
+    """Patch which only applies to objects of a kind and, optionally, a name."""
 
-    def __call__(self, obj) -> None:
-        """Update hubble-metrics entry in cilium-config ConfigMap."""
-        if not (obj.kind == "ConfigMap" and obj.metadata.name == "cilium-config"):
-            return
+    kind: str
+    name: Optional[str] = None
 
-        log.info(f"Patching hubble_metrics: {self.manifests.hubble_metrics}")
+    def __init__(self, manifests: Manifests, kind: Optional[str] = None):
+        super().__init__(manifests)
+        if kind:
+            self.kind = kind
 
-        if not self.manifests.hubble_metrics:
-            return
 
-        data = obj.data
-        values = {
-            "hubble-metrics": " ".join(self.manifests.hubble_metrics),
-            "hubble-metrics-server": ":9965",
-        }
-        data.update(values)
-        log.info(f"Patching Hubble metrics [{self.manifests.hubble_metrics}]: {data}")
+class PatchDispatcher(Patch):
+    """Run each targeted patch only against the objects it applies to.
 
+    Patches for a whole kind run before those for a specific object, each
+    group in the order given.
+    """
 
-class PatchCiliumOperatorAnnotations(Patch):
-    """Configure Cilium-Operatior metrics expose."""
+    def __init__(self, manifests: Manifests, patches: List[TargetedPatch]):
+        super().__init__(manifests)
+        self.patches: DefaultDict[Tuple[str, Optional[str]], List[TargetedPatch]]
+        self.patches = defaultdict(list)
+        for patch in patches:
+            self.patches[(patch.kind, patch.name)].append(patch)
 
     def __call__(self, obj) -> None:
-        """Update CIlium Operator Prometheus annotations."""
-        if not (obj.kind == "Deployment" and obj.metadata.name == "cilium-operator"):
-            return
-        if not self.manifests.config["enable-cilium-metrics"]:
-            return
+        """Dispatch the object to the patches registered for it."""
+        for key in ((obj.kind, None), (obj.kind, obj.metadata.name)):
+            for patch in self.patches.get(key, ()):
+                patch(obj)
 
-        annotations = {
-            "prometheus.io/port": "9963",
-            "prometheus.io/scrape": "true",
-        }
 
-        metadata = obj.spec.template.metadata
-        log.info(f"Metadata cilium-operator: {metadata}")
-        metadata.annotations = annotations
-        log.info(f"Metadata cilium-operator Patched: {metadata.annotations}")
+class PatchCiliumOperatorAnnotations(TargetedPatch):
+    """Configure Cilium-Operatior metrics expose."""
 
-
-class PatchCiliumDaemonSetAnnotations(Patch):
-    """Configure Cilium DaemonSet metrics expose."""
+    kind, name = "Deployment", "cilium-operator"
+    _ANNOTATIONS = {
+        "prometheus.io/port": "9963",
+        "prometheus.io/scrape": "true",
+    }
 
     def __call__(self, obj) -> None:
-        """Update Cilium Prometheus annotations."""
-        if not (obj.kind == "DaemonSet" and obj.metadata.name == "cilium"):
-            return
+        """Update CIlium Operator Prometheus annotations."""
         if not self.manifests.config["enable-cilium-metrics"]:
             return
 
-        annotations = {
-            "prometheus.io/port": "9962",
-            "prometheus.io/scrape": "true",
-        }
         metadata = obj.spec.template.metadata
-        log.info(f"Metadata: {metadata}")
+        log.debug("Metadata cilium-operator: %s", metadata)
+        metadata.annotations = dict(self._ANNOTATIONS)
+        log.debug("Metadata cilium-operator Patched: %s", metadata.annotations)
 
-        metadata.annotations = annotations
-        log.info(f"Metadata annotatd: {metadata}")
 
+class PatchCiliumDaemonSetAnnotations(TargetedPatch):
+    """Configure Cilium DaemonSet metrics expose."""
 
-class PatchPrometheusConfigMap(Patch):
-    """Configure Cilium Prometheus metrics."""
+    kind, name = "DaemonSet", "cilium"
+    _ANNOTATIONS = {
+        "prometheus.io/port": "9962",
+        "prometheus.io/scrape": "true",
+    }
 
     def __call__(self, obj) -> None:
-        """Update Cilium Components."""
-        if not (obj.kind == "ConfigMap" and obj.metadata.name == "cilium-config"):
-            return
-
+        """Update Cilium Prometheus annotations."""
         if not self.manifests.config["enable-cilium-metrics"]:
             return
 
-        log.info("Patching Cilium ConfigMap Prometheus Values.")
-        values = {
-            "prometheus-serve-addr": ":9962",
-            "proxy-prometheus-port": "9964",
-            "operator-prometheus-serve-addr": ":9963",
-            "enable-metrics": "true",
-        }
+        metadata = obj.spec.template.metadata
+        log.debug("Metadata: %s", metadata)
 
-        data = obj.data
-        data.update(values)
+        metadata.annotations = dict(self._ANNOTATIONS)
+        log.debug("Metadata annotatd: %s", metadata)
 
 
-class PatchCDKOnRelationChange(Patch):
+class PatchCDKOnRelationChange(TargetedPatch):
     """Patch Deployments/Daemonsets to be apart of cdk-restart-on-ca-change.
 
     * adding the config hash as an annotation
     * adding a cdk restart label
     """
 
+    _LABELS = {"cdk-restart-on-ca-change": "true"}
+
     def __call__(self, obj) -> None:
         """Modify the cilium-operator Deployment and cilium DaemonSet."""
-        if obj.kind not in ["Deployment", "DaemonSet"]:
-            return
-
-        title = f"{obj.kind}/{obj.metadata.name.title().replace('-', ' ')}"
-        log.info(f"Patching {title} cdk-restart-on-ca-changed label.")
-        label = {"cdk-restart-on-ca-change": "true"}
+        if log.isEnabledFor(logging.INFO):
+            title = f"{obj.kind}/{obj.metadata.name.title().replace('-', ' ')}"
+            log.info("Patching %s cdk-restart-on-ca-changed label.", title)
+            log.info("Adding hash to %s.", title)
         obj.metadata.labels = obj.metadata.labels or {}
-        obj.metadata.labels.update(label)
+        obj.metadata.labels.update(self._LABELS)
 
-        log.info(f"Adding hash to {title}.")
         obj.spec.template.metadata.annotations = {
             "juju.is/manifest-hash": self.manifests.config_hash
         }
 
 
-class SetIPv4CIDR(Patch):
-    """Configure IPv4 CIDR and Node Mask."""
+class PatchCiliumConfig(TargetedPatch):
+    """Configure the cilium-config ConfigMap.
+
+    * IPv4 cluster pool CIDR and node mask size
+    * Cilium Prometheus metrics
+    * Hubble Prometheus metrics
+    """
+
+    kind, name = "ConfigMap", "cilium-config"
+    _PROMETHEUS_VALUES = {
+        "prometheus-serve-addr": ":9962",
+        "proxy-prometheus-port": "9964",
+        "operator-prometheus-serve-addr": ":9963",
+        "enable-metrics": "true",
+    }
+    _HUBBLE_METRICS_VALUES = {"hubble-metrics-server": ":9965"}
 
     def __call__(self, obj) -> None:
-        """Update ConfigMap IPv4 CIDR and Mask size."""
-        if not (obj.kind == "ConfigMap" and obj.metadata.name == "cilium-config"):
-            return
+        """Update the cilium-config ConfigMap from the charm config."""
+        config, data = self.manifests.config, obj.data
+        hubble_metrics = self.manifests.hubble_metrics
+        if config["enable-cilium-metrics"]:
+            log.info("Patching Cilium ConfigMap Prometheus Values.")
+            data.update(self._PROMETHEUS_VALUES)
+
+        log.info("Patching hubble_metrics: %s", hubble_metrics)
+        if hubble_metrics:
+            data["hubble-metrics"] = " ".join(hubble_metrics)
+            data.update(self._HUBBLE_METRICS_VALUES)
+            log.debug("Patching Hubble metrics [%s]: %s", hubble_metrics, data)
 
-        data = obj.data
-        data["cluster-pool-ipv4-cidr"] = self.manifests.config["cluster-pool-ipv4-cidr"]
-        data["cluster-pool-ipv4-mask-size"] = self.manifests.config["cluster-pool-ipv4-mask-size"]
+        data["cluster-pool-ipv4-cidr"] = config["cluster-pool-ipv4-cidr"]
+        data["cluster-pool-ipv4-mask-size"] = config["cluster-pool-ipv4-mask-size"]
 
 
 class CiliumManifests(Manifests):
     """Deployment manager for the Cilium charm."""
 
     def __init__(self, charm, charm_config, hubble_metrics, service_cidr: Optional[str] = None):
-        self.service_cidr = service_cidr
+        self._service_cidr = service_cidr
+        self._rendered: Optional[Tuple[Tuple, KeysView[HashableResource]]] = None
         manipulations = [
             ConfigRegistry(self),
             ManifestLabel(self),
-            PatchCDKOnRelationChange(self),
-            PatchCiliumDaemonSetAnnotations(self),
-            PatchCiliumOperatorAnnotations(self),
-            PatchPrometheusConfigMap(self),
-            PatchHubbleMetricsConfigMap(self),
-            SetIPv4CIDR(self),
+            PatchDispatcher(
+                self,
+                [
+                    PatchCDKOnRelationChange(self, kind="Deployment"),
+                    PatchCDKOnRelationChange(self, kind="DaemonSet"),
+                    PatchCiliumDaemonSetAnnotations(self),
+                    PatchCiliumOperatorAnnotations(self),
+                    PatchCiliumConfig(self),
+                ],
+            ),
         ]
 
         super().__init__("cilium", charm.model, "upstream/cilium", manipulations)
@@ -155,19 +170,39 @@ class CiliumManifests(Manifests):
         self.hubble_metrics = hubble_metrics
 
     @property
+    def service_cidr(self) -> Optional[str]:
+        """Kubernetes service CIDR published on the CNI relation."""
+        return self._service_cidr
+
+    @service_cidr.setter
+    def service_cidr(self, value: Optional[str]):
+        if value != self._service_cidr:
+            self._service_cidr = value
+            self.invalidate()
+
+    def invalidate(self):
+        """Drop the cached config and hash after the charm config changes."""
+        self.__dict__.pop("config", None)
+        self.__dict__.pop("config_hash", None)
+
+    @cached_property
     def config(self) -> Dict:
         """Returns config mapped from charm config and joined relations."""
-        config = dict(**self.charm_config)
-        config["service-cidr"] = self.service_cidr
-
-        for key, value in dict(**config).items():
-            if value == "" or value is None:
-                del config[key]
-
-        config["release"] = config.pop("release", None)
+        config = {k: v for k, v in self.charm_config.items() if v not in ("", None)}
+        if self.service_cidr not in ("", None):
+            config["service-cidr"] = self.service_cidr
+        config.setdefault("release", None)
         return config
 
     @property
+    def resources(self) -> KeysView[HashableResource]:
+        """Manipulated resources, re-rendered only when their inputs change."""
+        key = (self.config_hash, tuple(self.hubble_metrics))
+        if self._rendered is None or self._rendered[0] != key:
+            self._rendered = (key, super().resources)
+        return self._rendered[1]
+
+    @cached_property
     def config_hash(self) -> str:
         """Return the configuration SHA256 hash from the charm config.
 
@@ -17,11 +17,6 @@ class HubbleManifests(Manifests):
     @property
     def config(self) -> Dict:
         """Returns config mapped from charm config and joined relations."""
-        config = dict(**self.charm_config)
-
-        for key, value in dict(**config).items():
-            if value == "" or value is None:
-                del config[key]
-
-        config["release"] = config.pop("release", None)
+        config = {k: v for k, v in self.charm_config.items() if v not in ("", None)}
+        config.setdefault("release", None)
         return config
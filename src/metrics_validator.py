@@ -1,9 +1,24 @@
 """Validator for Hubble Metrics configuration values."""
 
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 
 from pydantic import BaseModel, validator
 
+_ALLOWED_METRICS = frozenset(
+    (
+        "dns",
+        "drop",
+        "flow",
+        "flows-to-world",
+        "http",
+        "icmp",
+        "kafka",
+        "port-distribution",
+        "tcp",
+    )
+)
+
 
 class HubbleMetrics(BaseModel):
     """Class to validate the values of the Hubble Metrics provided by the user."""
@@ -18,18 +33,16 @@ class HubbleMetrics(BaseModel):
         refer to the following link for further information.
         https://docs.cilium.io/en/stable/observability/metrics/#hubble-metrics.
         """
-        allowed_values = {
-            "dns",
-            "drop",
-            "flow",
-            "flows-to-world",
-            "http",
-            "icmp",
-            "kafka",
-            "port-distribution",
-            "tcp",
-        }
-        for item in v:
-            if item not in allowed_values:
-                raise ValueError(f"{item} is not an allowed Hubble metric.")
+        if invalid := set(v).difference(_ALLOWED_METRICS):
+            raise ValueError(f"Invalid Hubble metrics: {', '.join(sorted(invalid))}")
         return v
+
+
+@lru_cache(maxsize=4)
+def validate_hubble_metrics(raw: str) -> Tuple[str, ...]:
+    """Validate a whitespace separated Hubble metrics config value.
+
+    Results are cached by the raw config string, so unchanged config skips
+    the pydantic model validation.
+    """
+    return tuple(HubbleMetrics(metrics=raw.split()).metrics)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import shlex
@@ -38,6 +39,12 @@ def pytest_addoption(parser):
         default="1.14.11",
         help="Cilium version to deploy",
     )
+    parser.addoption(
+        "--keep-cos",
+        action="store_true",
+        default=False,
+        help="Keep the MetalLB and COS Lite models for reuse by later runs",
+    )
 
 
 @pytest.fixture
@@ -89,30 +96,36 @@ async def cilium_np_resource(kubernetes):
 async def hubble_test_resources(kubernetes, cilium_np_resource):
     log.info("Creating Hubble test resources...")
     path = Path("tests/data/hubble-test.yaml")
-    pods = []
-    for obj in codecs.load_all_yaml(path.read_text()):
-        if obj.kind == "Pod":
-            pods.append(obj.metadata.name)
-        await kubernetes.create(obj)
-
-    for pod in pods:
-        await kubernetes.wait(
-            Pod,
-            pod,
-            for_conditions=["Ready"],
-            namespace="default",
+    objs = codecs.load_all_yaml(path.read_text())
+    pods = [obj.metadata.name for obj in objs if obj.kind == "Pod"]
+    await asyncio.gather(*(kubernetes.create(obj) for obj in objs))
+    await asyncio.gather(
+        *(
+            kubernetes.wait(
+                Pod,
+                pod,
+                for_conditions=["Ready"],
+                namespace="default",
+            )
+            for pod in pods
         )
+    )
 
     yield pods
 
     log.info("Deleting Hubble test resources...")
-    for obj in codecs.load_all_yaml(path.read_text()):
-        await kubernetes.delete(type(obj), obj.metadata.name, namespace=obj.metadata.namespace)
+    await asyncio.gather(
+        *(
+            kubernetes.delete(type(obj), obj.metadata.name, namespace=obj.metadata.namespace)
+            for obj in objs
+        )
+    )
 
 
 @pytest.fixture(scope="module")
 def kubectl(ops_test, kubeconfig):
     """Supports running kubectl exec commands."""
+    prefix = ("kubectl", "--kubeconfig", str(kubeconfig))
 
     async def f(*args, **kwargs) -> KubeCtl:
         """Actual callable returned by the fixture.
@@ -120,7 +133,7 @@ def kubectl(ops_test, kubeconfig):
         :returns: if kwargs[check] is True or undefined, stdout is returned
                   if kwargs[check] is False, Tuple[rc, stdout, stderr] is returned
         """
-        cmd = ["kubectl", "--kubeconfig", str(kubeconfig)] + list(args)
+        cmd = prefix + args
         check = kwargs["check"] = kwargs.get("check", True)
         rc, stdout, stderr = await ops_test.run(*cmd, **kwargs)
         if not check:
@@ -133,12 +146,18 @@ def kubectl(ops_test, kubeconfig):
 @pytest.fixture(scope="module")
 def kubectl_exec(kubectl):
     async def f(name: str, namespace: str, cmd: str, **kwds):
-        shcmd = f'exec {name} -n {namespace} -- sh -c "{cmd}"'
-        return await kubectl(*shlex.split(shcmd), **kwds)
+        return await kubectl("exec", name, "-n", namespace, "--", "sh", "-c", cmd, **kwds)
 
     return f
 
 
+@pytest.fixture(scope="module")
+def cos_model_keep(request, ops_test: OpsTest):
+    if request.config.getoption("--keep-cos"):
+        return ops_test.ModelKeep.ALWAYS
+    return ops_test.ModelKeep.NEVER
+
+
 @pytest.fixture(scope="module")
 async def k8s_cloud(request, kubeconfig, ops_test: OpsTest):
     cloud_name = request.config.getoption("--k8s-cloud")
@@ -151,7 +170,7 @@ async def k8s_cloud(request, kubeconfig, ops_test: OpsTest):
 
 
 @pytest.fixture(scope="module")
-async def metallb_model(k8s_cloud, ops_test: OpsTest):
+async def metallb_model(k8s_cloud, ops_test: OpsTest, cos_model_keep):
     log.info("Creating MetalLB model ...")
 
     model_alias = "metallb-model"
@@ -160,36 +179,48 @@ async def metallb_model(k8s_cloud, ops_test: OpsTest):
         model_alias,
         model_name=model_name,
         cloud_name=k8s_cloud,
-        keep=ops_test.ModelKeep.NEVER,
+        keep=cos_model_keep,
     )
 
     yield model
 
+    if cos_model_keep is ops_test.ModelKeep.ALWAYS:
+        log.info("Keeping MetalLB model ...")
+        await ops_test.forget_model(model_alias)
+        return
+
     log.info("Removing MetalLB model")
     await ops_test.forget_model(model_alias, timeout=5 * 60, allow_failure=False)
     log.info("MetalLB model removed ...")
 
 
 @pytest.fixture(scope="module")
-async def metallb_installed(request, metallb_model):
+async def metallb_installed(request, ops_test: OpsTest, metallb_model, cos_model_keep):
     ip_range = request.config.getoption("--metallb-iprange")
-    log.info(f"Deploying MetalLB with IP range: {ip_range} ...")
+    log.info("Deploying MetalLB with IP range: %s ...", ip_range)
 
     m = metallb_model
     charm = "metallb"
+    if charm in m.applications:
+        log.info("MetalLB already deployed, reusing it ...")
+        yield
+        return
+
     await m.deploy(entity_url=charm, trust=True, channel="stable", config={"iprange": ip_range})
     await m.block_until(lambda: charm in m.applications, timeout=60)
     await m.wait_for_idle(status="active", timeout=5 * 60)
 
     yield
 
+    if cos_model_keep is ops_test.ModelKeep.ALWAYS:
+        return
     log.info("Removing MetalLB charm...")
     await m.remove_application(charm, force=True, destroy_storage=True)
     await m.block_until(lambda: charm not in m.applications, timeout=60 * 10)
 
 
 @pytest.fixture(scope="module")
-async def cos_model(k8s_cloud, ops_test, metallb_installed):
+async def cos_model(k8s_cloud, ops_test, metallb_installed, cos_model_keep):
     log.info("Creating COS model ...")
 
     model_alias = "cos-model"
@@ -198,29 +229,41 @@ async def cos_model(k8s_cloud, ops_test, metallb_installed):
         model_alias,
         model_name=model_name,
         cloud_name=k8s_cloud,
-        keep=ops_test.ModelKeep.NEVER,
+        keep=cos_model_keep,
         config={"controller-service-type": "loadbalancer"},
     )
 
     yield model
 
+    if cos_model_keep is ops_test.ModelKeep.ALWAYS:
+        log.info("Keeping COS model ...")
+        await ops_test.forget_model(model_alias)
+        return
+
     log.info("Removing COS model ...")
     await ops_test.forget_model(model_alias, timeout=10 * 60, allow_failure=False)
     log.info("COS Model removed ...")
 
 
 @pytest.fixture(scope="module")
-async def cos_lite_installed(ops_test, cos_model):
+async def cos_lite_installed(ops_test, cos_model, cos_model_keep):
     log.info("Deploying COS bundle ...")
-    cos_charms = [
-        "alertmanager",
-        "catalogue",
-        "grafana",
-        "loki",
-        "prometheus",
-        "traefik",
-    ]
+    cos_charms = frozenset(
+        (
+            "alertmanager",
+            "catalogue",
+            "grafana",
+            "loki",
+            "prometheus",
+            "traefik",
+        )
+    )
     model = cos_model
+    if cos_charms.issubset(model.applications):
+        log.info("COS Lite already deployed, reusing it ...")
+        yield
+        return
+
     overlays = [
         ops_test.Bundle("cos-lite", "edge"),
         Path("tests/data/offers-overlay.yaml"),
@@ -233,19 +276,31 @@ async def cos_lite_installed(ops_test, cos_model):
     assert rc == 0, f"COS Lite failed to deploy: {(stderr or stdout).strip()}"
 
     await model.block_until(
-        lambda: all(app in model.applications for app in cos_charms),
+        lambda: cos_charms.issubset(model.applications),
         timeout=60,
     )
-    await model.wait_for_idle(status="active", timeout=20 * 60, raise_on_error=False)
+    # Only these apps back the Grafana and Prometheus tests; don't hold the
+    # fixture on alertmanager, catalogue or loki settling.
+    await model.wait_for_idle(
+        apps=["grafana", "prometheus", "traefik"],
+        status="active",
+        timeout=20 * 60,
+        raise_on_error=False,
+    )
 
     yield
 
-    log.info("Removing COS Lite charms...")
-    for charm in cos_charms:
-        log.info(f"Removing {charm}...")
-        await model.remove_application(charm, force=True, destroy_storage=True)
+    if cos_model_keep is ops_test.ModelKeep.ALWAYS:
+        return
+    log.info("Removing COS Lite charms: %s...", ", ".join(sorted(cos_charms)))
+    await asyncio.gather(
+        *(
+            model.remove_application(charm, force=True, destroy_storage=True)
+            for charm in cos_charms
+        )
+    )
     await model.block_until(
-        lambda: all(app not in model.applications for app in cos_charms),
+        lambda: cos_charms.isdisjoint(model.applications),
         timeout=60 * 10,
     )
 
@@ -255,15 +310,14 @@ async def traefik_ingress(cos_model, cos_lite_installed):
     yield await get_address(model=cos_model, app_name="traefik")
 
 
-@pytest.fixture(scope="module")
-async def expected_dashboard_titles():
+@pytest.fixture(scope="session")
+def expected_dashboard_titles():
     grafana_dir = Path("src/grafana_dashboards")
-    grafana_files = [p for p in grafana_dir.iterdir() if p.is_file() and p.name.endswith(".json")]
-    titles = []
-    for path in grafana_files:
-        dashboard = json.loads(path.read_text())
-        titles.append(dashboard["title"])
-    return set(titles)
+    return frozenset(
+        json.loads(path.read_bytes())["title"]
+        for path in grafana_dir.glob("*.json")
+        if path.is_file()
+    )
 
 
 @pytest.fixture(scope="module")
@@ -277,7 +331,7 @@ async def related_grafana(ops_test, cos_model, cos_lite_installed):
             "cilium:grafana-dashboard",
             f"{model_owner}/{cos_model_name}.grafana-dashboards",
         )
-        await cos_model.wait_for_idle(status="active")
+        await cos_model.wait_for_idle(apps=["grafana"], status="active")
         await k8s_model.wait_for_idle(status="active")
 
     yield
@@ -316,7 +370,7 @@ async def related_prometheus(ops_test: OpsTest, cos_model, cos_lite_installed):
             f"{model_owner}/{cos_model_name}.prometheus-receive-remote-write",
         )
         await k8s_model.wait_for_idle(status="active")
-        await cos_model.wait_for_idle(status="active")
+        await cos_model.wait_for_idle(apps=["prometheus"], status="active")
 
     yield
 
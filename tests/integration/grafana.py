@@ -1,6 +1,6 @@
 from typing import Optional
 
-import requests
+import httpx
 
 
 class Grafana:
@@ -25,6 +25,17 @@ class Grafana:
         self.base_uri = f"http://{host}/cos-grafana"
         self.username = username
         self.password = password
+        self._client = httpx.AsyncClient(
+            base_url=self.base_uri, auth=(username, password), timeout=30
+        )
+
+    async def __aenter__(self) -> "Grafana":
+        """Reuse one HTTP connection for every request made in the block."""
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close the HTTP connection."""
+        await self._client.aclose()
 
     async def is_ready(self) -> bool:
         """Send a request to check readiness.
@@ -41,10 +52,7 @@ class Grafana:
         Returns:
             Empty :dict: if it is not up, otherwise a dict containing basic API health
         """
-        api_path = "api/health"
-        uri = f"{self.base_uri}/{api_path}"
-
-        response = requests.get(uri, auth=(self.username, self.password))
+        response = await self._client.get("api/health")
 
         assert response.status_code == 200, f"Failed to get health endpoint: {response.text}"
         return response.json()
@@ -55,10 +63,7 @@ class Grafana:
         Returns:
           Found dashboards, if any
         """
-        api_path = "api/search"
-        uri = f"{self.base_uri}/{api_path}?starred=false"
-
-        response = requests.get(uri, auth=(self.username, self.password))
+        response = await self._client.get("api/search", params={"starred": "false"})
 
         assert response.status_code == 200, f"Failed to get dashboards endpoint: {response.text}"
         return response.json()
@@ -2,12 +2,14 @@
 # See LICENSE file for licensing details.
 
 import logging
+import re
 from ipaddress import AddressValueError, IPv4Address
 from typing import Optional
 
 from juju.model import Model
 
 logger = logging.getLogger(__name__)
+_IPV4_RE = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}\b")
 
 
 def _valid_ipv4(addr: str) -> Optional[IPv4Address]:
@@ -19,6 +21,8 @@ def _valid_ipv4(addr: str) -> Optional[IPv4Address]:
     Returns:
         valid IPv4 address or None otherwise.
     """
+    if not _IPV4_RE.fullmatch(addr):
+        return None
     try:
         return IPv4Address(addr)
     except AddressValueError:
@@ -36,11 +40,11 @@ async def get_address(model: Model, app_name: str, unit_num: Optional[int] = Non
     Returns:
         unit address as a string
     """
-    status = await model.get_status()
+    status = await model.get_status(filters=[app_name])
     app = status["applications"][app_name]
 
-    if from_status := [addr for addr in app.status.info.split() if _valid_ipv4(addr)]:
-        return from_status[0]
+    if from_status := next(filter(_valid_ipv4, _IPV4_RE.findall(app.status.info)), None):
+        return from_status
 
     return (
         app.public_address
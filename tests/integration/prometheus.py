@@ -1,6 +1,6 @@
 from typing import Optional
 
-import requests
+import httpx
 
 
 class Prometheus:
@@ -19,6 +19,15 @@ class Prometheus:
         """
         self.ops_test = ops_test
         self.base_uri = f"http://{host}/cos-prometheus-0"
+        self._client = httpx.AsyncClient(base_url=self.base_uri, timeout=30)
+
+    async def __aenter__(self) -> "Prometheus":
+        """Reuse one HTTP connection for every request made in the block."""
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close the HTTP connection."""
+        await self._client.aclose()
 
     async def is_ready(self) -> bool:
         """Send a request to check readiness.
@@ -38,10 +47,7 @@ class Prometheus:
         Returns:
             Empty :str: if it is not up, otherwise a str containing "Prometheus is Ready"
         """
-        api_path = "-/ready"
-        uri = f"{self.base_uri}/{api_path}"
-
-        response = requests.get(uri)
+        response = await self._client.get("-/ready")
 
         assert response.status_code == 200, f"Failed to get health endpoint: {response.text}"
         return response.text
@@ -52,11 +58,9 @@ class Prometheus:
         Returns:
           Found metrics, if any
         """
-        api_path = "api/v1/label/__name__/values"
-        uri = f"{self.base_uri}/{api_path}"
         params = {"match[]": ['{__name__=~".+", job!="prometheus"}']}
 
-        response = requests.get(uri, params=params)
+        response = await self._client.get("api/v1/label/__name__/values", params=params)
 
         assert response.status_code == 200, f"Failed to get metrics: {response.text}"
         return response.json()["data"]
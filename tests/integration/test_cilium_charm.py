@@ -3,8 +3,8 @@
 # See LICENSE file for licensing details.
 
 import asyncio
+import json
 import logging
-import re
 import shlex
 from pathlib import Path
 
@@ -16,7 +16,29 @@ from pytest_operator.plugin import OpsTest
 log = logging.getLogger(__name__)
 TEN_MINUTES = 10 * 60
 ONE_HOUR = 60 * 60
-SYSCTL = "{net.ipv4.conf.all.forwarding: 1, net.ipv4.conf.all.rp_filter: 0, net.ipv4.neigh.default.gc_thresh1: 128, net.ipv4.neigh.default.gc_thresh2: 28672, net.ipv4.neigh.default.gc_thresh3: 32768, net.ipv6.neigh.default.gc_thresh1: 128, net.ipv6.neigh.default.gc_thresh2: 28672, net.ipv6.neigh.default.gc_thresh3: 32768, fs.inotify.max_user_instances: 8192, fs.inotify.max_user_watches: 1048576, kernel.panic: 10, kernel.panic_on_oops: 1, vm.overcommit_memory: 1}"
+SYSCTL_SETTINGS = {
+    "net.ipv4.conf.all.forwarding": 1,
+    "net.ipv4.conf.all.rp_filter": 0,
+    "net.ipv4.neigh.default.gc_thresh1": 128,
+    "net.ipv4.neigh.default.gc_thresh2": 28672,
+    "net.ipv4.neigh.default.gc_thresh3": 32768,
+    "net.ipv6.neigh.default.gc_thresh1": 128,
+    "net.ipv6.neigh.default.gc_thresh2": 28672,
+    "net.ipv6.neigh.default.gc_thresh3": 32768,
+    "fs.inotify.max_user_instances": 8192,
+    "fs.inotify.max_user_watches": 1048576,
+    "kernel.panic": 10,
+    "kernel.panic_on_oops": 1,
+    "vm.overcommit_memory": 1,
+}
+# The principals' sysctl option is a YAML map; JSON is valid YAML.
+SYSCTL = json.dumps(SYSCTL_SETTINGS)
+
+
+async def wait_ready(service, name: str):
+    while not await service.is_ready():
+        log.info("Waiting for %s to be ready ...", name)
+        await asyncio.sleep(5)
 
 
 @pytest.mark.abort_on_fail
@@ -85,12 +107,11 @@ async def test_cilium_blocked(ops_test: OpsTest):
 
 async def test_cli_resources(ops_test: OpsTest):
     units = ops_test.model.applications["cilium"].units
-    cmds = ["hubble --version", "cilium version"]
+    cmd = " && ".join(["hubble --version", "cilium version"])
 
-    for unit in units:
-        cmd = " && ".join(cmds)
-        log.info(f"Running {cmd} on {unit.machine.hostname}")
-        action = await unit.run(cmd, timeout=60, block=True)
+    log.info("Running %s on %d units", cmd, len(units))
+    actions = await asyncio.gather(*(unit.run(cmd, timeout=60, block=True) for unit in units))
+    for unit, action in zip(units, actions):
         assert (
             action.status == "completed" and action.results["return-code"] == 0
         ), f"Failed to execute {cmd} on machine: {unit.machine.hostname}\n{action.results}"
@@ -120,21 +141,27 @@ async def test_hubble(ops_test, active_hubble, kubectl_exec):
     denied_req = "curl -s -XPUT deathstar.default.svc.cluster.local/v1/exhaust-port"
 
     log.info("Creating requests...")
-    await kubectl_exec("tiefighter", "default", allowed_req)
-    await kubectl_exec("tiefighter", "default", denied_req)
+    await asyncio.gather(
+        kubectl_exec("tiefighter", "default", allowed_req),
+        kubectl_exec("tiefighter", "default", denied_req),
+    )
 
     log.info("Retrieving logs from Hubble...")
     cmd = "hubble observe --pod deathstar --protocol http"
     stdout = None
+    loop = asyncio.get_running_loop()
+    deadline, delay = loop.time() + TEN_MINUTES, 1
     while not stdout:
+        assert loop.time() < deadline, f"No Hubble logs for {cmd} after {TEN_MINUTES}s"
         action = await cilium.run(cmd, timeout=10, block=True)
         assert (
             action.status == "completed" and action.results["return-code"] == 0
         ), f"Failed to fetch Hubble logs {cmd} on machine: {cilium.machine.hostname}\n{action.results}"
-        stdout = action.results.get("stdout")
+        if not (stdout := action.results.get("stdout")):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
 
-    forwarded = len(re.findall("FORWARDED", stdout))
-    dropped = len(re.findall("DROPPED", stdout))
+    forwarded, dropped = stdout.count("FORWARDED"), stdout.count("DROPPED")
     # The requests creates three records: The first one is allowed, therefore it will
     # create two FORWARDED records. As for the denied request, Hubble will create a
     # DROPPED one.
@@ -143,11 +170,9 @@ async def test_hubble(ops_test, active_hubble, kubectl_exec):
 
 
 async def test_grafana(ops_test, traefik_ingress, grafana_password, expected_dashboard_titles):
-    grafana = Grafana(ops_test=ops_test, host=traefik_ingress, password=grafana_password)
-    while not await grafana.is_ready():
-        log.info("Waiting for Grafana to be ready ...")
-        await asyncio.sleep(5)
-    dashboards = await grafana.dashboards_all()
+    async with Grafana(ops_test, host=traefik_ingress, password=grafana_password) as grafana:
+        await asyncio.wait_for(wait_ready(grafana, "Grafana"), timeout=TEN_MINUTES)
+        dashboards = await grafana.dashboards_all()
     actual_dashboard_titles = []
     for dashboard in dashboards:
         actual_dashboard_titles.append(dashboard["title"])
@@ -157,11 +182,11 @@ async def test_grafana(ops_test, traefik_ingress, grafana_password, expected_das
 
 @pytest.mark.usefixtures("related_prometheus")
 async def test_prometheus(ops_test, traefik_ingress):
-    prometheus = Prometheus(ops_test=ops_test, host=traefik_ingress)
-    while not await prometheus.is_ready():
-        log.info("Waiting for Prometheus to be ready...")
-        await asyncio.sleep(5)
-    log.info("Waiting for metrics...")
-    await asyncio.sleep(120)
-    metrics = await prometheus.get_metrics()
-    assert any(m.startswith("cilium_") for m in metrics), "No cilium metrics found in Prometheus"
+    async with Prometheus(ops_test=ops_test, host=traefik_ingress) as prometheus:
+        await asyncio.wait_for(wait_ready(prometheus, "Prometheus"), timeout=TEN_MINUTES)
+        log.info("Waiting for metrics...")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + TEN_MINUTES
+        while not any(m.startswith("cilium_") for m in await prometheus.get_metrics()):
+            assert loop.time() < deadline, "No cilium metrics found in Prometheus"
+            await asyncio.sleep(10)
@@ -1,5 +1,6 @@
 import contextlib
 import unittest.mock as mock
+from types import SimpleNamespace
 
 import ops.testing
 import pytest
@@ -35,8 +36,8 @@ def harness():
 def charm(request, harness: Harness[CiliumCharm]):
     """Create a charm with mocked methods.
 
-    This fixture utilizes ExitStack to dynamically mock methods in the Cilium Charm,
-    using the request markers defined in the `pytest_configure` method.
+    This fixture utilizes a single `patch.multiple` to dynamically mock methods in the
+    Cilium Charm, using the request markers defined in the `pytest_configure` method.
     """
     with contextlib.ExitStack() as stack:
         methods_to_mock = {
@@ -45,18 +46,37 @@ def charm(request, harness: Harness[CiliumCharm]):
             "_get_service_status": "skip_get_service_status",
             "_manage_port_forward_service": "skip_manage_port_forward_service",
         }
-        for method, marker in methods_to_mock.items():
-            if marker not in request.keywords:
-                stack.enter_context(mock.patch(f"charm.CiliumCharm.{method}", mock.MagicMock()))
+        attrs = {
+            method: mock.DEFAULT
+            for method, marker in methods_to_mock.items()
+            if marker not in request.keywords
+        }
+        if attrs:
+            stack.enter_context(mock.patch.multiple("charm.CiliumCharm", **attrs))
 
         harness.begin_with_initial_hooks()
         yield harness.charm
 
 
-@pytest.fixture(autouse=True)
-def lk_client():
+@pytest.fixture(scope="session")
+def _lk_client_patch():
     with mock.patch("ops.manifests.manifest.Client", autospec=True) as mock_lightkube:
-        yield mock_lightkube.return_value
+        yield mock_lightkube
+
+
+@pytest.fixture(autouse=True)
+def lk_client(_lk_client_patch):
+    """Reuse the session-wide autospec of the lightkube Client, reset per test."""
+    _lk_client_patch.reset_mock()
+    client = _lk_client_patch.return_value
+    client.reset_mock(return_value=True, side_effect=True)
+    yield client
+
+
+@pytest.fixture
+def mock_event():
+    """Lightweight stand-in for an ops event; the charm only ever defers them."""
+    return SimpleNamespace(defer=mock.MagicMock())
 
 
 @pytest.fixture()
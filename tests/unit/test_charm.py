@@ -1,10 +1,9 @@
 # Copyright 2022 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import io
 import tarfile
-import tempfile
 import unittest.mock as mock
-from pathlib import Path
 from tarfile import TarError
 
 import ops.testing
@@ -12,15 +11,38 @@ import pytest
 from ops.manifests import ManifestClientError
 from ops.model import BlockedStatus, MaintenanceStatus, ModelError, WaitingStatus
 
+from charm import _arch, _install_binary, _sysctl_get
+from metrics_validator import validate_hubble_metrics
+
 ops.testing.SIMULATE_CAN_CONNECT = True
 
 
-def test_arch(charm):
-    expected_arch = "amd64"
-    with mock.patch("charm.subprocess.check_output") as mock_check_output:
-        mock_check_output.return_value = expected_arch.encode("utf-8")
-        result = charm._arch
-        assert result == expected_arch
+@pytest.mark.parametrize(
+    "machine, expected_arch",
+    [
+        pytest.param("x86_64", "amd64", id="amd64"),
+        pytest.param("aarch64", "arm64", id="arm64"),
+        pytest.param("s390x", "s390x", id="s390x"),
+    ],
+)
+def test_arch(machine, expected_arch):
+    _arch.cache_clear()
+    with mock.patch("charm.platform.machine", return_value=machine):
+        with mock.patch("charm.check_output") as mock_check_output:
+            assert _arch() == expected_arch
+            mock_check_output.assert_not_called()
+    _arch.cache_clear()
+
+
+def test_arch_dpkg_fallback():
+    _arch.cache_clear()
+    with mock.patch("charm.platform.machine", return_value="riscv64"):
+        with mock.patch("charm.check_output") as mock_check_output:
+            mock_check_output.return_value = b"riscv64\n"
+            assert _arch() == "riscv64"
+            assert _arch() == "riscv64"
+            mock_check_output.assert_called_once_with(["dpkg", "--print-architecture"])
+    _arch.cache_clear()
 
 
 @pytest.mark.parametrize(
@@ -55,6 +77,16 @@ def test_check_port_forward_service(harness, charm, input_data, expected_status)
     assert charm.unit.status == expected_status
 
 
+def test_check_port_forward_service_disabled(harness, charm):
+    harness.disable_hooks()
+    harness.update_config({"port-forward-hubble": False})
+    charm.stored.port_forward_enabled = False
+
+    charm._check_port_forward_service()
+
+    charm._get_service_status.assert_not_called()
+
+
 @pytest.mark.parametrize(
     "kubeconfig_status",
     [
@@ -62,43 +94,70 @@ def test_check_port_forward_service(harness, charm, input_data, expected_status)
         pytest.param(True, id="Kubeconfig Available"),
     ],
 )
-@mock.patch("charm.CiliumCharm._get_kubeconfig_status")
+@mock.patch("charm.CiliumCharm._kubeconfig_ready", new_callable=mock.PropertyMock)
 @mock.patch("charm.CiliumCharm._configure_cilium_cni")
 @mock.patch("charm.CiliumCharm._configure_hubble")
 def test_configure_cilium(
     mock_configure_hubble,
     mock_configure_cilium,
-    mock_get_kubeconfig_status,
+    mock_kubeconfig_ready,
     charm,
     kubeconfig_status,
+    mock_event,
 ):
-    mock_get_kubeconfig_status.return_value = kubeconfig_status
-    mock_event = mock.MagicMock()
-    charm._configure_cilium(mock_event)
+    mock_kubeconfig_ready.return_value = kubeconfig_status
+    config = dict(charm.config)
+    charm._configure_cilium(mock_event, config)
     if kubeconfig_status:
         mock_configure_cilium.assert_called_once_with(mock_event)
-        mock_configure_hubble.assert_called_once_with(mock_event)
+        mock_configure_hubble.assert_called_once_with(mock_event, config)
     else:
         mock_configure_cilium.assert_not_called()
         mock_configure_hubble.assert_not_called()
 
 
-def test_configure_cilium_cni(charm):
+@pytest.mark.parametrize(
+    "side_effect,expected_status",
+    [
+        pytest.param(None, MaintenanceStatus("Applying Cilium resources."), id="Applied"),
+        pytest.param(
+            ManifestClientError(),
+            WaitingStatus("Waiting to retry Cilium configuration."),
+            id="Failed",
+        ),
+    ],
+)
+def test_configure_cilium_cni(charm, mock_event, side_effect, expected_status):
     with mock.patch.object(charm.cilium_manifests, "apply_manifests") as mock_apply:
-        mock_event = mock.MagicMock()
+        mock_apply.side_effect = side_effect
         charm._configure_cilium_cni(mock_event)
         mock_apply.assert_called_once()
-        assert charm.unit.status == MaintenanceStatus("Applying Cilium resources.")
+        assert charm.unit.status == expected_status
+        assert bool(charm.stored.cilium_apply_hash) is (side_effect is None)
 
 
-def test_configure_cilium_cni_exception(charm):
-    with mock.patch.object(charm.cilium_manifests, "apply_manifests") as mock_apply:
-        mock_event = mock.MagicMock()
-        mock_apply.side_effect = ManifestClientError()
+def test_configure_cilium_cni_unchanged(charm, mock_event):
+    manifests = charm.cilium_manifests
+    with mock.patch.object(manifests, "apply_manifests") as mock_apply, mock.patch.object(
+        manifests, "installed_resources"
+    ) as mock_installed:
+        mock_installed.return_value = frozenset(manifests.resources)
+        charm._configure_cilium_cni(mock_event)
+        charm._configure_cilium_cni(mock_event)
+        mock_apply.assert_called_once()
 
+        mock_installed.return_value = frozenset(list(manifests.resources)[1:])
         charm._configure_cilium_cni(mock_event)
+        assert mock_apply.call_count == 2, "missing resources are re-applied"
+        mock_installed.return_value = frozenset(manifests.resources)
 
-        assert charm.unit.status == WaitingStatus("Waiting to retry Cilium configuration.")
+        charm.stored.cilium_apply_hash = ""
+        charm._configure_cilium_cni(mock_event)
+        assert mock_apply.call_count == 3
+
+        charm.__dict__["_cni_relation_state"] = ("efgh5678", None)
+        charm._configure_cilium_cni(mock_event)
+        assert mock_apply.call_count == 4
 
 
 def test_configure_cni_relation(harness, charm):
@@ -108,7 +167,7 @@ def test_configure_cni_relation(harness, charm):
     rel_id = harness.add_relation("cni", "kubernetes-control-plane")
     harness.add_relation_unit(rel_id, "kubernetes-control-plane/0")
 
-    charm._configure_cni_relation()
+    charm._configure_cni_relation(charm.config)
     assert charm.unit.status == MaintenanceStatus("Configuring CNI relation")
     assert len(harness.model.relations["cni"]) == 1
     relation = harness.model.relations["cni"][0]
@@ -117,71 +176,230 @@ def test_configure_cni_relation(harness, charm):
         "cni-conf-file": "05-cilium.conf",
     }
 
+    charm.unit.status = WaitingStatus("Unchanged")
+    charm._configure_cni_relation(charm.config)
+    assert charm.unit.status == WaitingStatus("Unchanged")
 
-@pytest.mark.parametrize(
-    "enable_hubble,hubble_configured",
-    [
-        pytest.param(True, False, id="Enable Hubble"),
-        pytest.param(False, True, id="Remove Hubble"),
-    ],
-)
-def test_configure_hubble(charm, harness, enable_hubble, hubble_configured):
+
+@pytest.fixture
+def hubble_mocks(charm):
     with mock.patch.object(charm.hubble_manifests, "apply_manifests") as mock_apply:
         with mock.patch.object(charm.hubble_manifests, "delete_manifests") as mock_delete:
-            harness.update_config({"enable-hubble": enable_hubble})
-            charm.stored.hubble_configured = hubble_configured
-            mock_event = mock.MagicMock()
-
-            charm._configure_hubble(mock_event)
-            if enable_hubble:
-                mock_apply.assert_called_once()
-            else:
-                mock_delete.assert_called_once()
+            yield mock_apply, mock_delete
 
 
 @pytest.mark.parametrize(
-    "enable_hubble,hubble_configured",
+    "enable_hubble,hubble_configured,fail,expected_status",
     [
-        pytest.param(True, False, id="Enable Hubble"),
-        pytest.param(False, True, id="Remove Hubble"),
+        pytest.param(
+            True,
+            False,
+            False,
+            MaintenanceStatus("Applying Hubble resources."),
+            id="Enable Hubble",
+        ),
+        pytest.param(
+            True,
+            False,
+            True,
+            WaitingStatus("Waiting to retry Hubble configuration."),
+            id="Enable Hubble / Failed",
+        ),
+        pytest.param(
+            False,
+            True,
+            False,
+            MaintenanceStatus("Removing Hubble resources."),
+            id="Remove Hubble",
+        ),
+        pytest.param(
+            False,
+            True,
+            True,
+            WaitingStatus("Waiting to retry Hubble removal."),
+            id="Remove Hubble / Failed",
+        ),
     ],
 )
-def test_configure_hubble_exception(charm, harness, enable_hubble, hubble_configured):
+def test_configure_hubble(
+    charm,
+    harness,
+    hubble_mocks,
+    mock_event,
+    enable_hubble,
+    hubble_configured,
+    fail,
+    expected_status,
+):
+    mock_apply, mock_delete = hubble_mocks
+    harness.update_config({"enable-hubble": enable_hubble})
+    charm.stored.hubble_configured = hubble_configured
+    if fail:
+        mock_apply.side_effect = mock_delete.side_effect = ManifestClientError()
+
+    charm._configure_hubble(mock_event, charm.config)
+    if enable_hubble:
+        mock_apply.assert_called_once()
+    else:
+        mock_delete.assert_called_once()
+    assert charm.unit.status == expected_status
+    assert charm.stored.hubble_configured is (enable_hubble != fail)
+
+
+def test_configure_hubble_unchanged(charm, harness, hubble_mocks, mock_event):
+    mock_apply, _ = hubble_mocks
+    manifests = charm.hubble_manifests
+    harness.update_config({"enable-hubble": True})
+    with mock.patch.object(manifests, "installed_resources") as mock_installed:
+        mock_installed.return_value = frozenset(manifests.resources)
+        charm._configure_hubble(mock_event, charm.config)
+        charm._configure_hubble(mock_event, charm.config)
+        mock_apply.assert_called_once()
+
+        mock_installed.return_value = frozenset()
+        charm._configure_hubble(mock_event, charm.config)
+        assert mock_apply.call_count == 2, "missing resources are re-applied"
+
+
+def test_configure_hubble_invalid_metrics(charm, harness, mock_event):
     with mock.patch.object(charm.hubble_manifests, "apply_manifests") as mock_apply:
-        with mock.patch.object(charm.hubble_manifests, "delete_manifests") as mock_delete:
-            harness.update_config({"enable-hubble": enable_hubble})
-            charm.stored.hubble_configured = hubble_configured
-            mock_event = mock.MagicMock()
-            mock_apply.side_effect = mock_delete.side_effect = ManifestClientError()
+        harness.update_config({"enable-hubble": True, "enable-hubble-metrics": "dns bogus"})
+        charm._configure_hubble(mock_event, charm.config)
+
+        mock_apply.assert_not_called()
+        assert charm.unit.status == BlockedStatus(
+            "Hubble Metrics should only contain valid metrics values."
+        )
+        assert charm.stored.unallowed_metrics
+
+
+def test_validate_hubble_metrics_reports_all_invalid():
+    with pytest.raises(ValueError, match=r"Invalid Hubble metrics: bogus, missing \("):
+        validate_hubble_metrics("missing dns bogus")
+    with pytest.raises(ValueError, match=r"Invalid Hubble metrics: bogus \("):
+        validate_hubble_metrics("dns bogus")
 
-            charm._configure_hubble(mock_event)
-            if enable_hubble:
-                assert charm.unit.status == WaitingStatus("Waiting to retry Hubble configuration.")
-            else:
-                assert charm.unit.status == WaitingStatus("Waiting to retry Hubble removal.")
 
+def test_configure_hubble_metrics(charm):
+    validate_hubble_metrics.cache_clear()
+    config = {"enable-hubble-metrics": "dns drop  flow"}
+    charm._configure_hubble_metrics(config)
+    charm._configure_hubble_metrics(config)
 
-def test_get_kubeconfig_status(harness, charm):
+    assert charm.hubble_metrics == ["dns", "drop", "flow"]
+    assert validate_hubble_metrics.cache_info().hits == 1
+
+
+def test_kubeconfig_ready(harness, charm):
     harness.disable_hooks()
     rel_id = harness.add_relation("cni", "kubernetes-control-plane")
     harness.add_relation_unit(rel_id, "kubernetes-control-plane/0")
-    assert not charm._get_kubeconfig_status()
+    assert not charm._kubeconfig_ready
+
+    harness.update_relation_data(
+        rel_id, "kubernetes-control-plane/0", {"kubeconfig-hash": "abcd1234"}
+    )
+    assert not charm._kubeconfig_ready, "cached for the current hook"
+
+    charm._invalidate_hook_cache()
+    assert charm._kubeconfig_ready
 
+
+def test_cni_relation_state_across_units(harness, charm):
+    harness.disable_hooks()
+    rel_id = harness.add_relation("cni", "kubernetes-control-plane")
+    harness.add_relation_unit(rel_id, "kubernetes-control-plane/0")
+    harness.add_relation_unit(rel_id, "kubernetes-control-plane/1")
     harness.update_relation_data(
         rel_id, "kubernetes-control-plane/0", {"kubeconfig-hash": "abcd1234"}
     )
-    assert charm._get_kubeconfig_status()
+    harness.update_relation_data(
+        rel_id, "kubernetes-control-plane/1", {"service-cidr": "10.152.183.0/24"}
+    )
+    charm._invalidate_hook_cache()
+
+    assert charm._cni_relation_state == ("abcd1234", "10.152.183.0/24")
+
+
+def test_get_service_cidr(harness, charm):
+    harness.disable_hooks()
+    rel_id = harness.add_relation("cni", "kubernetes-control-plane")
+    harness.add_relation_unit(rel_id, "kubernetes-control-plane/0")
+    harness.update_relation_data(
+        rel_id,
+        "kubernetes-control-plane/0",
+        {"kubeconfig-hash": "abcd1234", "service-cidr": "10.152.183.0/24"},
+    )
+    charm._invalidate_hook_cache()
+
+    assert charm._cni_relation_state == ("abcd1234", "10.152.183.0/24")
+    assert charm._get_service_cidr() == "10.152.183.0/24"
 
 
-def test_get_arch_cli_tools(charm):
-    mock_tarfile = mock.MagicMock(spec=tarfile.TarFile)
-    mock_member = mock.MagicMock(spec=tarfile.TarInfo)
-    mock_member.name = "test_arm64.tar.gz"
-    mock_tarfile.__iter__.return_value = [mock_member]
+def _make_bundle(tmp_path, filename, binary=b"#!/bin/sh\n", mode="w:gz"):
+    inner = tmp_path / filename
+    with tarfile.open(inner, mode) as tar:
+        info = tarfile.TarInfo("cilium")
+        info.size = len(binary)
+        info.mode = 0o755
+        tar.addfile(info, io.BytesIO(binary))
+    bundle = tmp_path / "bundle.tar.gz"
+    with tarfile.open(bundle, "w:gz") as tar:
+        tar.add(inner, arcname=filename)
+    return bundle
 
-    tools = list(charm._get_arch_cli_tools(mock_tarfile, "test_arm64.tar.gz"))
-    assert len(tools) == 1
-    assert tools[0] == mock_member
+
+@pytest.mark.parametrize(
+    "mode",
+    [
+        pytest.param("w:gz", id="gzip"),
+        pytest.param("w", id="uncompressed"),
+        pytest.param("w:bz2", id="bzip2"),
+    ],
+)
+def test_unpack_archive(charm, tmp_path, mode):
+    bundle = _make_bundle(tmp_path, "cilium-linux-arm64.tar.gz", mode=mode)
+    dest = tmp_path / "bin"
+    dest.mkdir()
+    with mock.patch("charm.CLI_CLIENTS_PATH", dest):
+        charm._unpack_archive(bundle, "cilium-linux-arm64.tar.gz")
+    assert (dest / "cilium").read_bytes() == b"#!/bin/sh\n"
+    assert (dest / "cilium").stat().st_mode & 0o111
+    assert [p.name for p in dest.iterdir()] == ["cilium"]
+
+
+def test_unpack_archive_corrupt(charm, tmp_path):
+    inner = tmp_path / "cilium-linux-arm64.tar.gz"
+    inner.write_bytes(b"not an archive")
+    bundle = tmp_path / "bundle.tar.gz"
+    with tarfile.open(bundle, "w:gz") as tar:
+        tar.add(inner, arcname=inner.name)
+    with mock.patch("charm.CLI_CLIENTS_PATH", tmp_path), pytest.raises(TarError):
+        charm._unpack_archive(bundle, inner.name)
+
+
+def test_install_binary(tmp_path):
+    dest = tmp_path / "cilium"
+    stale = tmp_path / ".cilium.tmp"
+    stale.write_bytes(b"partial")
+    stale.chmod(0o600)
+
+    _install_binary(io.BytesIO(b"#!/bin/sh\n"), dest)
+    assert dest.read_bytes() == b"#!/bin/sh\n"
+    assert dest.stat().st_mode & 0o777 == 0o755
+    assert not stale.exists()
+
+    with mock.patch("charm.shutil.copyfileobj", side_effect=OSError):
+        with pytest.raises(OSError):
+            _install_binary(io.BytesIO(b"changed"), dest)
+    assert dest.read_bytes() == b"#!/bin/sh\n"
+    assert not stale.exists()
+
+
+def test_unpack_archive_missing(charm, tmp_path):
+    bundle = _make_bundle(tmp_path, "cilium-linux-arm64.tar.gz")
+    with pytest.raises(FileNotFoundError):
+        charm._unpack_archive(bundle, "cilium-linux-amd64.tar.gz")
 
 
 @pytest.mark.skip_get_service_status
@@ -195,16 +413,39 @@ def test_get_service_status(charm):
         assert status == 1
 
 
+@pytest.mark.skip_get_service_status
+def test_get_service_status_cgroup(charm, tmp_path):
+    (tmp_path / "mock-service").mkdir()
+    with mock.patch("charm.SYSTEMD_CGROUP_PATHS", (tmp_path,)):
+        with mock.patch("charm.subprocess.call") as mock_subprocess_call:
+            assert charm._get_service_status("mock-service") == 0
+            mock_subprocess_call.assert_not_called()
+
+
 @pytest.mark.skip_install_cli_resources
 @mock.patch("charm.CiliumCharm._unpack_archive")
-def test_install_cli_resources(mock_unpack, charm, harness):
-    with mock.patch.object(
-        charm.model.resources,
-        "fetch",
-        lambda rsc: str(tempfile.NamedTemporaryFile().name),
-    ):
-        charm._install_cli_resources()
-        assert mock_unpack.call_count == 2
+def test_install_cli_resources(mock_unpack, charm, harness, tmp_path):
+    resource = tmp_path / "resource"
+    resource.touch()
+    bin_path = tmp_path / "bin"
+    bin_path.mkdir()
+    mock_unpack.side_effect = lambda path, filename: (bin_path / filename.split("-")[0]).touch()
+    with mock.patch.object(charm.model.resources, "fetch", lambda rsc: resource):
+        with mock.patch("charm.CLI_CLIENTS_PATH", bin_path):
+            charm._install_cli_resources()
+            assert mock_unpack.call_count == 2
+
+            charm._install_cli_resources()
+            assert mock_unpack.call_count == 2, "unchanged resources are skipped"
+
+            (bin_path / "cilium").unlink()
+            charm._install_cli_resources()
+            assert mock_unpack.call_count == 3, "missing binaries are re-extracted"
+            assert (bin_path / "cilium").exists()
+
+            charm.stored.resource_sig = {}
+            charm._install_cli_resources()
+            assert mock_unpack.call_count == 5
 
 
 @pytest.mark.skip_install_cli_resources
@@ -239,12 +480,23 @@ def test_install_cli_resources_exception(charm, side_effect, expected_status):
 
 
 @pytest.mark.skip_install_service
-def test_install_service(charm):
-    with mock.patch("charm.subprocess.check_call") as mock_check_call:
-        with mock.patch("charm.shutil.copy") as mock_copy:
-            charm._install_service("/path/to/service/file")
+def test_install_service(charm, tmp_path):
+    service_file = tmp_path / "mock.service"
+    service_file.write_text("[Unit]\n")
+    systemd_path = tmp_path / "system"
+    systemd_path.mkdir()
+    with mock.patch("charm.SYSTEMD_PATH", systemd_path):
+        with mock.patch("charm.subprocess.check_call") as mock_check_call:
+            charm._install_service(service_file)
+            assert (systemd_path / "mock.service").read_text() == "[Unit]\n"
+            mock_check_call.assert_called_once_with(["systemctl", "daemon-reload"])
+
+            mock_check_call.reset_mock()
+            charm._install_service(service_file)
+            mock_check_call.assert_not_called()
 
-            mock_copy.assert_called_once_with("/path/to/service/file", Path("/etc/systemd/system"))
+            service_file.write_text("[Unit]\nDescription=changed\n")
+            charm._install_service(service_file)
             mock_check_call.assert_called_once_with(["systemctl", "daemon-reload"])
 
 
@@ -253,18 +505,12 @@ def test_install_service(charm):
     [
         pytest.param(
             True,
-            [
-                mock.call(["systemctl", "enable", "hubble-port-forward.service"]),
-                mock.call(["systemctl", "start", "hubble-port-forward.service"]),
-            ],
+            [mock.call(["systemctl", "enable", "--now", "hubble-port-forward.service"])],
             id="Enable the service",
         ),
         pytest.param(
             False,
-            [
-                mock.call(["systemctl", "disable", "hubble-port-forward.service"]),
-                mock.call(["systemctl", "stop", "hubble-port-forward.service"]),
-            ],
+            [mock.call(["systemctl", "disable", "--now", "hubble-port-forward.service"])],
             id="Disable the service",
         ),
     ],
@@ -276,6 +522,18 @@ def test_manage_port_forward_service(charm, enable, expected_calls):
 
         mock_check_call.assert_has_calls(expected_calls)
         assert charm.unit.status == WaitingStatus("Waiting Hubble port-forward service.")
+        assert charm.stored.port_forward_enabled is enable
+
+
+@pytest.mark.skip_manage_port_forward_service
+def test_manage_port_forward_service_already_disabled(charm):
+    with mock.patch("charm.subprocess.check_call") as mock_check_call:
+        charm._manage_port_forward_service()
+        charm._manage_port_forward_service()
+
+        mock_check_call.assert_called_once_with(
+            ["systemctl", "disable", "--now", "hubble-port-forward.service"]
+        )
 
 
 @pytest.mark.parametrize(
@@ -312,18 +570,17 @@ def test_on_port_forward_hubble(mock_port_forward, input_data, expected_calls, c
         }
     )
 
-    charm._on_port_forward_hubble()
+    charm._on_port_forward_hubble(charm.config)
 
     assert charm.stored.hubble_mismatch_config == input_data["mismatch"]
     mock_port_forward.assert_has_calls(expected_calls)
 
 
 @mock.patch("charm.CiliumCharm._handle_grafana_agent")
-def test_on_remote_write_changed(mock_handle, charm, harness):
+def test_on_remote_write_changed(mock_handle, charm, harness, mock_event):
     with mock.patch.object(charm, "remote_write_consumer") as mock_endpoints:
         harness.set_leader(True)
         mock_endpoints.endpoints = ["192.168.3.17", "192.168.3.21"]
-        mock_event = mock.MagicMock()
         charm._on_remote_write_changed(mock_event)
 
         mock_handle.assert_called_once_with(
@@ -336,9 +593,8 @@ def test_on_remote_write_changed(mock_handle, charm, harness):
 
 
 @mock.patch("charm.CiliumCharm._handle_grafana_agent")
-def test_on_remote_write_departed(mock_handle, charm, harness):
+def test_on_remote_write_departed(mock_handle, charm, harness, mock_event):
     harness.set_leader(True)
-    mock_event = mock.MagicMock()
     charm._on_remote_write_departed(mock_event)
 
     mock_handle.assert_called_once_with(
@@ -350,10 +606,11 @@ def test_on_remote_write_departed(mock_handle, charm, harness):
 
 
 @mock.patch("charm.CiliumCharm._set_active_status")
-@mock.patch("charm.CiliumCharm._get_kubeconfig_status", return_value=True)
-def test_handle_grafana_agent(mock_get, mock_set_status, charm, harness):
+@mock.patch(
+    "charm.CiliumCharm._kubeconfig_ready", new_callable=mock.PropertyMock, return_value=True
+)
+def test_handle_grafana_agent(mock_get, mock_set_status, charm, harness, mock_event):
     harness.set_leader(True)
-    mock_event = mock.MagicMock()
     mock_operation = mock.MagicMock()
     charm._handle_grafana_agent(mock_event, "verb", "noun", mock_operation)
     mock_operation.assert_called_once()
@@ -361,11 +618,140 @@ def test_handle_grafana_agent(mock_get, mock_set_status, charm, harness):
 
 
 @mock.patch("charm.CiliumCharm._set_active_status")
-@mock.patch("charm.CiliumCharm._get_kubeconfig_status", return_value=True)
-def test_handle_grafana_agent_fails(mock_get, mock_set_status, charm, harness, api_error_klass):
+@mock.patch(
+    "charm.CiliumCharm._kubeconfig_ready", new_callable=mock.PropertyMock, return_value=True
+)
+def test_handle_grafana_agent_fails(
+    mock_get, mock_set_status, charm, harness, api_error_klass, mock_event
+):
     harness.set_leader(True)
-    mock_event = mock.MagicMock()
     mock_operation = mock.MagicMock(side_effect=api_error_klass)
     charm._handle_grafana_agent(mock_event, "verb", "noun", mock_operation)
 
     mock_event.defer.assert_called_once()
+
+
+def test_deploy_grafana_agent(charm):
+    client = charm.__dict__["_client"] = mock.MagicMock()
+    endpoints = [{"url": "http://192.168.3.17:9090/api/v1/write"}]
+    objects = charm._render_grafana_agent_manifests(remote_endpoints=endpoints)
+
+    charm._deploy_grafana_agent(endpoints)
+
+    assert client.apply.call_count == len(objects)
+    client.apply.assert_has_calls([mock.call(obj) for obj in objects], any_order=True)
+
+
+def test_remove_grafana_agent(charm, api_error_klass):
+    client = charm.__dict__["_client"] = mock.MagicMock()
+    objects = charm._render_grafana_agent_manifests()
+
+    charm._remove_grafana_agent()
+    assert client.delete.call_count == len(objects)
+
+    client.delete.side_effect = api_error_klass
+    with pytest.raises(api_error_klass):
+        charm._remove_grafana_agent()
+
+
+def test_set_status(charm):
+    with mock.patch.object(charm.unit, "_backend") as mock_backend:
+        charm._set_status(MaintenanceStatus("Applying Cilium resources."))
+        charm._set_status(MaintenanceStatus("Applying Cilium resources."))
+        charm._set_status(WaitingStatus("Waiting for Kubernetes API"))
+        assert mock_backend.status_set.call_count == 2
+
+
+@mock.patch("charm.CiliumCharm._configure_cni_relation")
+def test_on_config_changed_cidr_unchanged(mock_configure_cni, harness, charm):
+    harness.update_config({"enable-cilium-metrics": True})
+    mock_configure_cni.assert_not_called()
+
+    harness.update_config({"cluster-pool-ipv4-cidr": "10.1.0.0/16"})
+    mock_configure_cni.assert_called_once()
+    assert charm.stored.last_cidr == "10.1.0.0/16"
+
+
+@pytest.mark.skip_install_cli_resources
+@mock.patch("charm.CiliumCharm._unpack_archive")
+def test_install_cli_resources_partial_failure(mock_unpack, charm, tmp_path):
+    def unpack(path, filename):
+        if filename.startswith("hubble"):
+            raise TarError()
+
+    mock_unpack.side_effect = unpack
+    resource = tmp_path / "resource"
+    resource.touch()
+    with mock.patch.object(charm.model.resources, "fetch", lambda rsc: resource):
+        charm._install_cli_resources()
+
+    assert charm.unit.status == BlockedStatus("Error unpacking CLI binaries.")
+    assert "cilium" in charm.stored.resource_sig
+    assert "hubble" not in charm.stored.resource_sig
+
+
+def test_cilium_manifests_config(harness, charm):
+    harness.disable_hooks()
+    harness.update_config({"image-registry": "", "release": "1.14.11"})
+    charm.cilium_manifests.service_cidr = "10.152.183.0/24"
+
+    config = charm.cilium_manifests.config
+
+    assert "image-registry" not in config
+    assert config["service-cidr"] == "10.152.183.0/24"
+    assert config["release"] == "1.14.11"
+
+    harness.update_config(unset=["release"])
+    assert charm.cilium_manifests.config is config
+    charm.cilium_manifests.service_cidr = None
+    config = charm.cilium_manifests.config
+    assert "service-cidr" not in config
+    assert config["release"] is None
+
+
+def test_cilium_manifests_resources_cached(harness, charm):
+    harness.disable_hooks()
+    manifests = charm.cilium_manifests
+    resources = manifests.resources
+    assert manifests.resources is resources
+
+    charm.hubble_metrics.append("dns")
+    assert manifests.resources is not resources
+    charm.hubble_metrics.clear()
+
+    resources = manifests.resources
+    harness.update_config({"cluster-pool-ipv4-cidr": "10.1.0.0/16"})
+    assert manifests.resources is resources, "config cached for the current hook"
+    charm._invalidate_hook_cache()
+    assert manifests.resources is not resources
+
+
+def test_cilium_manifests_patches(harness, charm):
+    harness.disable_hooks()
+    harness.update_config({"cluster-pool-ipv4-cidr": "10.1.0.0/16"})
+    charm.hubble_metrics.extend(["dns", "drop"])
+    resources = {(r.kind, r.name): r.resource for r in charm.cilium_manifests.resources}
+
+    config_map = resources[("ConfigMap", "cilium-config")]
+    assert config_map.data["cluster-pool-ipv4-cidr"] == "10.1.0.0/16"
+    assert config_map.data["hubble-metrics"] == "dns drop"
+    assert config_map.data["hubble-metrics-server"] == ":9965"
+    for kind, name in [("DaemonSet", "cilium"), ("Deployment", "cilium-operator")]:
+        obj = resources[(kind, name)]
+        assert obj.metadata.labels["cdk-restart-on-ca-change"] == "true"
+        assert "juju.is/manifest-hash" in obj.spec.template.metadata.annotations
+
+
+def test_sysctl_get(tmp_path):
+    rp_filter = tmp_path / "net/ipv4/conf/all/rp_filter"
+    rp_filter.parent.mkdir(parents=True)
+    rp_filter.write_text("2\n")
+    with mock.patch("charm.SYSCTL_PATH", tmp_path):
+        with mock.patch("charm.check_output") as mock_check_output:
+            assert _sysctl_get("net.ipv4.conf.all.rp_filter") == {
+                "net.ipv4.conf.all.rp_filter": "2"
+            }
+            mock_check_output.assert_not_called()
+
+            mock_check_output.return_value = "net.ipv4.ip_forward = 1\n"
+            assert _sysctl_get("net.ipv4.ip_forward") == {"net.ipv4.ip_forward": "1"}